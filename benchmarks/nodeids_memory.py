@@ -0,0 +1,113 @@
+"""
+Compares memory and lookup time of node ids of the huge suite:
+plain list and set of strings (how they were kept before) vs `NodeIdStore`.
+Lookups (`in` and `index`) are measured in order of adding (how `TestRunner`
+usually gets collected items) and in random order
+
+    python benchmarks/nodeids_memory.py 1000000
+"""
+from __future__ import print_function
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from pytest_xdist_tracker.nodeids import NodeIdStore
+
+
+def generate_nodeids(count):
+    """
+    Emulates parametrized tests with long ids spread by modules
+    """
+    for idx in range(count):
+        yield (
+            "tests/backend/integration/module_{module}/test_module_{module}.py"
+            "::TestHeavyParametrization::test_case[user-admin-read-write-{idx}-{param}]"
+        ).format(module=idx // 50000, idx=idx, param="x" * (idx % 13))
+
+
+def measure(build, count):
+    """
+    Returns
+    -------
+    Tuple[float, float]
+        used memory in MB and seconds spent (measured without tracing)
+    """
+    gc.collect()
+    started = time.time()
+    build(generate_nodeids(count))
+    spent = time.time() - started
+    gc.collect()
+    tracemalloc.start()
+    result = build(generate_nodeids(count))
+    used = tracemalloc.get_traced_memory()[0] / 1024.0 / 1024
+    tracemalloc.stop()
+    del result
+    return used, spent
+
+
+def build_list_and_set(nodeids):
+    storage = []
+    seen = set()
+    for nodeid in nodeids:
+        if nodeid not in seen:
+            seen.add(nodeid)
+            storage.append(nodeid)
+    return storage, seen
+
+
+def measure_lookups(contains, index, nodeids):
+    """
+    Returns
+    -------
+    Tuple[float, float]
+        microseconds per `in` and per `index` lookup
+    """
+    started = time.time()
+    for nodeid in nodeids:
+        contains(nodeid)
+    contains_time = time.time() - started
+    started = time.time()
+    for nodeid in nodeids:
+        index(nodeid)
+    index_time = time.time() - started
+    return (
+        contains_time * 1000000 / len(nodeids),
+        index_time * 1000000 / len(nodeids),
+    )
+
+
+def main(count):
+    list_memory, list_time = measure(build_list_and_set, count)
+    store_memory, store_time = measure(NodeIdStore, count)
+    print("node ids: {}".format(count))
+    print("build:")
+    print("  list + set:  {:8.1f} MB {:6.1f} s".format(list_memory, list_time))
+    print("  NodeIdStore: {:8.1f} MB {:6.1f} s".format(store_memory, store_time))
+    print("  bytes per node id: {:.1f}".format(store_memory * 1024 * 1024 / count))
+
+    nodeids = list(generate_nodeids(count))
+    shuffled = list(nodeids)
+    random.Random(0).shuffle(shuffled)
+    # `list.index` is O(n), so the previous way is measured via set + dict of indexes
+    seen = set(nodeids)
+    indexes = {nodeid: idx for idx, nodeid in enumerate(nodeids)}
+    store = NodeIdStore(nodeids)
+    print("lookups (us per `in` / `index`):")
+    for order, lookups in (("sequential", nodeids), ("random", shuffled)):
+        print(
+            "  set + dict  {:10} {:6.2f} / {:6.2f}".format(
+                order, *measure_lookups(seen.__contains__, indexes.get, lookups)
+            )
+        )
+        print(
+            "  NodeIdStore {:10} {:6.2f} / {:6.2f}".format(
+                order, *measure_lookups(store.__contains__, store.index, lookups)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,366 @@
+from __future__ import absolute_import
+
+import hashlib
+import io
+import os
+import re
+import time
+import zlib
+
+import pytest
+
+ENCODING = "utf-8"
+CACHE_DIR = "xdist_tracker"
+INDEX_KEY = "xdist_tracker/index"
+LAST = "last"
+LAST_FAILED = "last-failed"
+MEGABYTE = 1024 * 1024
+# temporary segment file which is not renamed during this time is left by killed process
+STALE_TMP_SECONDS = 60 * 60
+# "last-failed", "last:gw1", "20210101-120000-1234:gw0"
+# (bare "last" is not a reference, there is no way to pick one of its workers)
+REFERENCE = re.compile(r"^(last-failed|[\w-]+:gw\d+)$")
+
+
+def empty_index():
+    """
+    Returns
+    -------
+    dict
+        {
+            "runs": {
+                "20210101-120000-1234": {
+                    "accessed": 1609502400.0,
+                    "workers": {"gw0": {"segment": "5d41...", "failed": False}},
+                },
+            },
+            "segments": {"5d41...": 128},
+            "last": "20210101-120000-1234",
+            "last_failed": None,
+        }
+    """
+    return {"runs": {}, "segments": {}, "last": None, "last_failed": None}
+
+
+def is_reference(value):
+    """
+    Parameters
+    ----------
+    value: str
+        passed via `--from-xdist-stats`
+
+    Returns
+    -------
+    bool
+        `True` if value looks like reference to archived run instead of file
+    """
+    return bool(REFERENCE.match(value))
+
+
+def make_run_id():
+    """
+    Returns
+    -------
+    str
+        "20210101-120000-1234"
+    """
+    return "{}-{}".format(time.strftime("%Y%m%d-%H%M%S"), os.getpid())
+
+
+class RunArchive(object):
+    """
+    Keeps worker histories of the last runs inside the pytest cache
+    Every history stored once as compressed segment named by its content hash,
+    so runs with the same worker history share the same segment.
+    Runs are evicted (least recently used first) when limits are exceeded
+    """
+
+    def __init__(self, cache, keep_runs, max_size):
+        """
+        Parameters
+        ----------
+        cache: _pytest.cacheprovider.Cache
+        keep_runs: int
+            how many runs to keep
+        max_size: float
+            maximum size of all segments in MB
+        """
+        self.cache = cache
+        self.keep_runs = keep_runs
+        self.max_bytes = int(max_size * MEGABYTE)
+        self.directory = cache.makedir(CACHE_DIR)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Parameters
+        ----------
+        config: _pytest.config.Config
+
+        Returns
+        -------
+        Optional[RunArchive]
+            `None` when cache plugin disabled or archive turned off via `--xdist-stats-keep-runs=0`
+        """
+        cache = getattr(config, "cache", None)
+        if cache is None:
+            return None
+        keep_runs = config.getoption("xdist_stats_keep_runs")
+        if not keep_runs or keep_runs <= 0:
+            return None
+        return cls(cache, keep_runs, config.getoption("xdist_stats_keep_size"))
+
+    def segment_path(self, digest):
+        """
+        Parameters
+        ----------
+        digest: str
+
+        Returns
+        -------
+        str
+            ".pytest_cache/d/xdist_tracker/5d41402abc4b2a76b9719d911017c592.z"
+        """
+        return str(self.directory / "{}.z".format(digest))
+
+    def load_index(self):
+        """
+        Returns
+        -------
+        dict
+        """
+        return self.cache.get(INDEX_KEY, None) or empty_index()
+
+    def save_index(self, index):
+        """
+        Parameters
+        ----------
+        index: dict
+        """
+        self.cache.set(INDEX_KEY, index)
+
+    def add_segment(self, content):
+        """
+        Save worker history as compressed segment, the same history is written only once
+
+        Parameters
+        ----------
+        content: str
+            quoted test names separated by new line
+
+        Returns
+        -------
+        str
+            digest of the segment
+        """
+        data = content.encode(ENCODING)
+        digest = hashlib.sha1(data).hexdigest()
+        path = self.segment_path(digest)
+        if not os.path.isfile(path):
+            # workers could write the same segment at the same time
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            with io.open(tmp_path, "wb") as file:
+                file.write(zlib.compress(data))
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                os.remove(tmp_path)
+        return digest
+
+    def read_segment(self, digest):
+        """
+        Parameters
+        ----------
+        digest: str
+
+        Returns
+        -------
+        List[str]
+            lines of the artifact
+            [
+                "tests/backend/test_one.py%3A%3Atest_one",
+                "tests/backend/test_one.py%3A%3Atest_two\tsession:db",
+                ...
+            ]
+        """
+        with io.open(self.segment_path(digest), "rb") as file:
+            content = zlib.decompress(file.read()).decode(ENCODING)
+        return [line for line in content.split("\n") if line]
+
+    def add_run(self, workers, run_id=None):
+        """
+        Register finished run and evict old ones
+
+        Parameters
+        ----------
+        workers: dict
+            {"gw0": {"segment": "5d41...", "failed": False}, ...}
+        run_id: Optional[str]
+
+        Returns
+        -------
+        str
+            id of the registered run
+        """
+        run_id = run_id or make_run_id()
+        index = self.load_index()
+        for info in workers.values():
+            path = self.segment_path(info["segment"])
+            if os.path.isfile(path):
+                index["segments"][info["segment"]] = os.path.getsize(path)
+        index["runs"][run_id] = {"accessed": time.time(), "workers": workers}
+        index["last"] = run_id
+        if any(info["failed"] for info in workers.values()):
+            index["last_failed"] = run_id
+        self.evict(index, keep=run_id)
+        self.save_index(index)
+        return run_id
+
+    @staticmethod
+    def used_segments(index):
+        """
+        Parameters
+        ----------
+        index: dict
+
+        Returns
+        -------
+        set[str]
+        """
+        return {
+            info["segment"]
+            for run in index["runs"].values()
+            for info in run["workers"].values()
+        }
+
+    def size(self, index):
+        """
+        Parameters
+        ----------
+        index: dict
+
+        Returns
+        -------
+        int
+            size in bytes of all segments used by kept runs
+        """
+        return sum(
+            index["segments"].get(digest, 0) for digest in self.used_segments(index)
+        )
+
+    def sweep(self, index):
+        """
+        Remove segments which are not used by any run of the index
+        (written by workers of the run which was never registered, e.g. interrupted)
+        and temporary files left by killed workers
+
+        Parameters
+        ----------
+        index: dict
+
+        Returns
+        -------
+        int
+            size in bytes of temporary files which are still being written
+        """
+        used = self.used_segments(index)
+        directory = str(self.directory)
+        pending = 0
+        for file_name in os.listdir(directory):
+            path = os.path.join(directory, file_name)
+            try:
+                if file_name.endswith(".tmp"):
+                    if time.time() - os.path.getmtime(path) < STALE_TMP_SECONDS:
+                        pending += os.path.getsize(path)
+                        continue
+                elif not file_name.endswith(".z") or file_name[:-2] in used:
+                    continue
+                os.remove(path)
+            except OSError:
+                # already renamed or removed by concurrent session
+                pass
+        return pending
+
+    def evict(self, index, keep=None):
+        """
+        Drop least recently used runs while there are more than `keep_runs`
+        or they take (together with files not used by any run) more than `max_size`,
+        then remove unused segments
+
+        Parameters
+        ----------
+        index: dict
+        keep: Optional[str]
+            id of the run which never evicted (usually the current one)
+        """
+        pending = self.sweep(index)
+        candidates = sorted(
+            (run_id for run_id in index["runs"] if run_id != keep),
+            key=lambda run_id: index["runs"][run_id]["accessed"],
+        )
+        for run_id in candidates:
+            if (
+                len(index["runs"]) <= self.keep_runs
+                and self.size(index) + pending <= self.max_bytes
+            ):
+                break
+            del index["runs"][run_id]
+            for key in ("last", "last_failed"):
+                if index[key] == run_id:
+                    index[key] = None
+
+        used = self.used_segments(index)
+        for digest in list(index["segments"]):
+            if digest in used:
+                continue
+            del index["segments"][digest]
+            path = self.segment_path(digest)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def read(self, reference):
+        """
+        Resolve reference like `last-failed:gw3` to the worker history
+
+        Parameters
+        ----------
+        reference: str
+            "last:gw1", "last-failed", "last-failed:gw3", "20210101-120000-1234:gw0"
+
+        Returns
+        -------
+        Optional[List[str]]
+            lines of the artifact, `None` when reference is not a known run
+        """
+        run_ref, _, worker_id = reference.partition(":")
+        index = self.load_index()
+        if run_ref in (LAST, LAST_FAILED):
+            run_id = index[run_ref.replace("-", "_")]
+            if run_id is None:
+                raise pytest.UsageError(
+                    "There is no stored run for `{}`".format(reference)
+                )
+        elif run_ref in index["runs"]:
+            run_id = run_ref
+        else:
+            return None
+
+        run = index["runs"][run_id]
+        if not worker_id and run_ref == LAST_FAILED:
+            failed = sorted(w for w, info in run["workers"].items() if info["failed"])
+            worker_id = failed[0] if failed else ""
+        if worker_id not in run["workers"]:
+            raise pytest.UsageError(
+                "Run {} has no worker `{}`, available: {}".format(
+                    run_id, worker_id, ", ".join(sorted(run["workers"]))
+                )
+            )
+        run["accessed"] = time.time()
+        self.save_index(index)
+        try:
+            return self.read_segment(run["workers"][worker_id]["segment"])
+        except (IOError, OSError):
+            # segment could be evicted by concurrent session before the run was registered
+            raise pytest.UsageError(
+                "History of `{}` was removed from the archive".format(reference)
+            )
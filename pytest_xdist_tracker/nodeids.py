@@ -0,0 +1,346 @@
+from __future__ import absolute_import
+
+from array import array
+
+ENCODING = "utf-8"
+EMPTY = -1
+
+
+def common_prefix_length(first, second):
+    """
+    Parameters
+    ----------
+    first: bytes
+    second: bytes
+
+    Returns
+    -------
+    int
+    """
+    low, high = 0, min(len(first), len(second))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first[:middle] == second[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def write_varint(buffer, value):
+    """
+    Parameters
+    ----------
+    buffer: bytearray
+    value: int
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(buffer, position):
+    """
+    Parameters
+    ----------
+    buffer: bytearray
+    position: int
+
+    Returns
+    -------
+    Tuple[int, int]
+        value and position after it
+    """
+    value = shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class NodeIdStore(object):
+    """
+    Ordered set of test node ids which keeps them front coded:
+    node ids are grouped by blocks, inside of block every node id stored
+    as length of prefix shared with the previous one and the rest of it.
+    Tests usually are executed module by module, so neighbours share most of the node id.
+    Membership is checked via open addressing hash table of indexes,
+    so full strings are materialised only during iteration or comparison
+    """
+
+    BLOCK_SIZE = 16
+
+    def __init__(self, nodeids=()):
+        """
+        Parameters
+        ----------
+        nodeids: Iterable[str]
+        """
+        self._data = bytearray()
+        # start of every completed block in `_data`
+        self._offsets = array("L")
+        # node ids of the block which is not completed yet
+        self._tail = []
+        # the last decoded block, lookups usually go in order of adding
+        self._cached_block = EMPTY
+        self._cached_nodeids = []
+        # index of the last compared node id, to notice lookups in order of adding
+        self._compared_index = EMPTY
+        self._size = 0
+        self._bits = 3
+        self._slots = array("l", [EMPTY]) * (1 << self._bits)
+        self._fingerprints = array("H", [0]) * (1 << self._bits)
+        for nodeid in nodeids:
+            self.add(nodeid)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for block in range(len(self._offsets)):
+            for nodeid in self._decode_block(block):
+                yield nodeid.decode(ENCODING)
+        for nodeid in self._tail:
+            yield nodeid
+
+    def __contains__(self, nodeid):
+        return self._lookup(nodeid)[1] != EMPTY
+
+    def __getitem__(self, index):
+        """
+        Parameters
+        ----------
+        index: int
+
+        Returns
+        -------
+        str
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("NodeIdStore index out of range")
+        block, position = divmod(index, self.BLOCK_SIZE)
+        if block == len(self._offsets):
+            return self._tail[position]
+        if block != self._cached_block:
+            self._cached_nodeids = self._decode_block(block)
+            self._cached_block = block
+        return self._cached_nodeids[position].decode(ENCODING)
+
+    def index(self, nodeid):
+        """
+        Parameters
+        ----------
+        nodeid: str
+
+        Returns
+        -------
+        int
+            position of node id in order of adding
+        """
+        index = self._lookup(nodeid)[1]
+        if index == EMPTY:
+            raise ValueError("{!r} is not in NodeIdStore".format(nodeid))
+        return index
+
+    def add(self, nodeid):
+        """
+        Parameters
+        ----------
+        nodeid: str
+
+        Returns
+        -------
+        bool
+            `False` if node id was already added
+        """
+        slot, index = self._lookup(nodeid)
+        if index != EMPTY:
+            return False
+        self._slots[slot] = self._size
+        self._fingerprints[slot] = (hash(nodeid) >> self._bits) & 0xFFFF
+        self._size += 1
+        self._tail.append(nodeid)
+        if len(self._tail) == self.BLOCK_SIZE:
+            self._offsets.append(len(self._data))
+            self._data.extend(self._encode_block(self._tail))
+            self._tail = []
+        if self._size * 2 > len(self._slots):
+            self._resize(self._bits + 1)
+        return True
+
+    @staticmethod
+    def _encode_block(nodeids):
+        """
+        Parameters
+        ----------
+        nodeids: List[str]
+
+        Returns
+        -------
+        bytearray
+        """
+        block = bytearray()
+        previous = b""
+        for nodeid in nodeids:
+            data = nodeid.encode(ENCODING)
+            prefix = common_prefix_length(previous, data)
+            write_varint(block, prefix)
+            write_varint(block, len(data) - prefix)
+            block.extend(data[prefix:])
+            previous = data
+        return block
+
+    def _decode_block(self, block):
+        """
+        Parameters
+        ----------
+        block: int
+
+        Returns
+        -------
+        List[bytes]
+            encoded node ids
+        """
+        data = self._data
+        position = self._offsets[block]
+        nodeids = []
+        previous = b""
+        for _ in range(self.BLOCK_SIZE):
+            # lengths are usually less than 128, so they take one byte
+            prefix = data[position]
+            if prefix < 0x80:
+                position += 1
+            else:
+                prefix, position = read_varint(data, position)
+            length = data[position]
+            if length < 0x80:
+                position += 1
+            else:
+                length, position = read_varint(data, position)
+            previous = previous[:prefix] + bytes(data[position : position + length])
+            position += length
+            nodeids.append(previous)
+        return nodeids
+
+    def _decode_nodeid(self, block, position):
+        """
+        Decodes block only up to `position`: reads lengths of previous node ids
+        and joins just those parts of them which the node id is made of
+
+        Parameters
+        ----------
+        block: int
+        position: int
+            position of node id inside of the block
+
+        Returns
+        -------
+        bytes
+            encoded node id
+        """
+        data = self._data
+        offset = self._offsets[block]
+        # (prefix length, start of the rest in `_data`) of every node id up to position
+        parts = []
+        for _ in range(position + 1):
+            prefix = data[offset]
+            if prefix < 0x80:
+                offset += 1
+            else:
+                prefix, offset = read_varint(data, offset)
+            length = data[offset]
+            if length < 0x80:
+                offset += 1
+            else:
+                length, offset = read_varint(data, offset)
+            parts.append((prefix, offset))
+            offset += length
+        prefix, start = parts[-1]
+        chunks = [data[start:offset]]
+        # every prefix is taken from the previous node id, which itself
+        # consists of its prefix and own rest
+        for previous_prefix, previous_start in reversed(parts[:-1]):
+            if prefix > previous_prefix:
+                chunks.append(
+                    data[previous_start : previous_start + prefix - previous_prefix]
+                )
+                prefix = previous_prefix
+            if not prefix:
+                break
+        return bytes(bytearray().join(reversed(chunks)))
+
+    def _is_equal(self, index, nodeid):
+        """
+        Parameters
+        ----------
+        index: int
+        nodeid: str
+
+        Returns
+        -------
+        bool
+            `True` if node id with this index is the same
+        """
+        block, position = divmod(index, self.BLOCK_SIZE)
+        if block == len(self._offsets):
+            return self._tail[position] == nodeid
+        is_sequential = index == self._compared_index + 1
+        self._compared_index = index
+        if block != self._cached_block:
+            if not is_sequential:
+                # only node ids up to the compared one are needed
+                return self._decode_nodeid(block, position) == nodeid.encode(ENCODING)
+            # lookups go in order of adding, the rest of block will be served from the cache
+            self._cached_nodeids = self._decode_block(block)
+            self._cached_block = block
+        return self._cached_nodeids[position] == nodeid.encode(ENCODING)
+
+    def _lookup(self, nodeid):
+        """
+        Parameters
+        ----------
+        nodeid: str
+
+        Returns
+        -------
+        Tuple[int, int]
+            slot in the hash table and index of node id (`EMPTY` if absent)
+        """
+        node_hash = hash(nodeid)
+        # bits above the slot ones, so fingerprint distinguishes node ids of the same slot
+        fingerprint = (node_hash >> self._bits) & 0xFFFF
+        mask = len(self._slots) - 1
+        slot = node_hash & mask
+        while self._slots[slot] != EMPTY:
+            index = self._slots[slot]
+            if self._fingerprints[slot] == fingerprint and self._is_equal(
+                index, nodeid
+            ):
+                return slot, index
+            slot = (slot + 1) & mask
+        return slot, EMPTY
+
+    def _resize(self, bits):
+        """
+        Parameters
+        ----------
+        bits: int
+            new size of hash table as power of two
+        """
+        self._bits = bits
+        self._slots = array("l", [EMPTY]) * (1 << bits)
+        self._fingerprints = array("H", [0]) * (1 << bits)
+        mask = (1 << bits) - 1
+        for index, nodeid in enumerate(self):
+            node_hash = hash(nodeid)
+            slot = node_hash & mask
+            while self._slots[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            self._slots[slot] = index
+            self._fingerprints[slot] = (node_hash >> bits) & 0xFFFF
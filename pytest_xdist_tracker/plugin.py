@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+from pytest_xdist_tracker.shards import TestSharder
 from pytest_xdist_tracker.tracker import TestRunner, TestTracker
 
 
@@ -22,6 +23,67 @@ def pytest_addoption(parser):
             "xdist_stats_worker_gw0.txt and xdist_stats_worker_gw1.txt"
         ),
     )
+    group.addoption(
+        "--xdist-stats-shard",
+        action="store",
+        default=None,
+        dest="xdist_stats_shard",
+        help=(
+            "Shard (CI machine) id, adds it to the artifacts names like "
+            "xdist_stats_shard_1_worker_gw0.txt, "
+            "with `--xdist-stats-shards` it is the index of the shard to run"
+        ),
+    )
+    group.addoption(
+        "--xdist-stats-shards",
+        action="store",
+        type=int,
+        default=None,
+        dest="xdist_stats_shards",
+        help=(
+            "Total number of shards, runs only tests planned for `--xdist-stats-shard`, "
+            "shards are balanced by durations from `--xdist-stats-history`"
+        ),
+    )
+    group.addoption(
+        "--xdist-stats-history",
+        action="append",
+        default=[],
+        dest="xdist_stats_history",
+        help=(
+            "Artifacts (glob pattern) collected from all shards with recorded durations, "
+            "e.g. `artifacts/xdist_stats_shard_*_worker_gw*.txt`"
+        ),
+    )
+    group.addoption(
+        "--xdist-stats-coupled",
+        action="store",
+        default=None,
+        dest="xdist_stats_coupled",
+        help=(
+            "File where each line is tests separated by tab which must run on the same shard"
+        ),
+    )
+    group.addoption(
+        "--xdist-stats-keep-runs",
+        action="store",
+        type=int,
+        default=10,
+        dest="xdist_stats_keep_runs",
+        help=(
+            "How many runs keep in the pytest cache (by default %(default)s), "
+            "the least recently used are evicted first, `0` disables the archive. "
+            "Archived run could be reproduced via `--from-xdist-stats=last-failed:gw3`"
+        ),
+    )
+    group.addoption(
+        "--xdist-stats-keep-size",
+        action="store",
+        type=float,
+        default=50,
+        dest="xdist_stats_keep_size",
+        help="Maximum size in MB of archived runs in the pytest cache (by default %(default)s)",
+    )
     group.addoption(
         "--from-xdist-stats",
         action="store",
@@ -29,11 +91,32 @@ def pytest_addoption(parser):
         dest="from_xdist_stats",
         help=(
             "File (generated by `--xdist-stats`) with tests(nodeid) to run in single thread, "
+            "or archived run like `last:gw1`, `last-failed` or `last-failed:gw3`, "
             "could be helpful to reproduce issues "
             "related to coupled tests which corrupted or doesn't clear some state after self "
             "(not work with xdist `-n`)"
         ),
     )
+    group.addoption(
+        "--xdist-stats-prune",
+        action="store_true",
+        default=False,
+        dest="xdist_stats_prune",
+        help=(
+            "Run from `--from-xdist-stats` only the target test (the last one by default) "
+            "and tests before it which share the module or session scoped fixtures with it"
+        ),
+    )
+    group.addoption(
+        "--xdist-stats-prune-target",
+        action="store",
+        default=None,
+        dest="xdist_stats_prune_target",
+        help=(
+            "Test to prune `--from-xdist-stats` for (implies `--xdist-stats-prune`), "
+            "e.g. `--xdist-stats-prune-target=tests/test_one.py::test_one`"
+        ),
+    )
 
 
 def pytest_configure(config):
@@ -51,3 +134,6 @@ def pytest_configure(config):
     if is_run_to_reproduce and not (is_run_with_xdist or is_run_xdist_worker):
         runner = TestRunner(config)
         config.pluginmanager.register(runner, name="xdist_runner")
+    if config.getoption("--xdist-stats-shards") and not is_run_to_reproduce:
+        sharder = TestSharder(config)
+        config.pluginmanager.register(sharder, name="xdist_sharder")
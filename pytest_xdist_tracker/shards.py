@@ -0,0 +1,188 @@
+from __future__ import absolute_import
+
+import glob
+import io
+from collections import OrderedDict
+
+import pytest
+
+from pytest_xdist_tracker.tracker import ENCODING, parse_line
+
+
+def read_histories(patterns):
+    """
+    Merges artifacts collected from all shards into one run view
+
+    Parameters
+    ----------
+    patterns: List[str]
+        ["artifacts/xdist_stats_shard_*_worker_gw*.txt"]
+
+    Returns
+    -------
+    OrderedDict
+        path -> executed tests in order of execution
+        (artifacts of different runs usually have the same file name)
+        {
+            "artifacts/run1/xdist_stats_shard_0_worker_gw0.txt": [
+                ("tests/test_one.py::test_one", ["session:db"], 0.125),
+                ...
+            ],
+            ...
+        }
+    """
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    histories = OrderedDict()
+    for path in paths:
+        with io.open(path, "rb") as file:
+            histories[path] = [
+                parse_line(line.decode(ENCODING)) for line in file if line.strip()
+            ]
+    return histories
+
+
+def get_durations(histories):
+    """
+    Parameters
+    ----------
+    histories: OrderedDict
+        result of `read_histories`
+
+    Returns
+    -------
+    dict
+        test name -> mean duration across all runs where it was recorded
+        {"tests/test_one.py::test_one": 0.125, ...}
+    """
+    durations = {}
+    for history in histories.values():
+        for name, _, duration in history:
+            if duration is not None:
+                durations.setdefault(name, []).append(duration)
+    return {name: sum(values) / len(values) for name, values in durations.items()}
+
+
+def read_coupled(path):
+    """
+    Parameters
+    ----------
+    path: str
+        file where each line is tests separated by tab which must run on the same shard
+
+    Returns
+    -------
+    List[List[str]]
+        [["tests/test_one.py::test_one", "tests/test_two.py::test_two"], ...]
+    """
+    with io.open(path, "rb") as file:
+        lines = [line.decode(ENCODING).rstrip("\n") for line in file]
+    return [line.split("\t") for line in lines if line.strip()]
+
+
+def plan_shards(names, durations, shards, coupled=()):
+    """
+    Splits tests into shards with balanced total duration,
+    coupled tests always land to the same shard.
+    The same arguments always give the same plan,
+    so every CI machine could build it independently
+
+    Parameters
+    ----------
+    names: List[str]
+        tests in collection order
+    durations: dict
+        test name -> duration, tests without duration get the mean one
+    shards: int
+    coupled: List[List[str]]
+
+    Returns
+    -------
+    List[List[str]]
+        tests of every shard in collection order
+    """
+    parents = OrderedDict((name, name) for name in names)
+
+    def find(name):
+        while parents[name] != name:
+            parents[name] = parents[parents[name]]
+            name = parents[name]
+        return name
+
+    for group in coupled:
+        members = [name for name in group if name in parents]
+        for name in members[1:]:
+            parents[find(name)] = find(members[0])
+
+    groups = OrderedDict()
+    for name in names:
+        groups.setdefault(find(name), []).append(name)
+
+    known = [durations[name] for name in names if name in durations]
+    default = sum(known) / len(known) if known else 1.0
+    weights = {
+        root: sum(durations.get(name, default) for name in group)
+        for root, group in groups.items()
+    }
+
+    loads = [0.0] * shards
+    plan = [set() for _ in range(shards)]
+    # longest groups first, each goes to the least loaded shard
+    for root in sorted(groups, key=lambda root: (-weights[root], root)):
+        shard = min(range(shards), key=lambda idx: (loads[idx], idx))
+        loads[shard] += weights[root]
+        plan[shard].update(groups[root])
+    return [[name for name in names if name in shard] for shard in plan]
+
+
+class TestSharder(object):
+    """
+    This plugin deselects tests which are planned for other shards (CI machines)
+    using durations recorded via `TestTracker` and known coupled tests
+    """
+
+    def __init__(self, config):
+        """
+        Parameters
+        ----------
+        config: _pytest.config.Config
+        """
+        self.config = config
+        self.shards = config.getoption("--xdist-stats-shards")
+        shard_id = config.getoption("--xdist-stats-shard")
+        if shard_id is None or not shard_id.isdigit() or int(shard_id) >= self.shards:
+            raise pytest.UsageError(
+                "--xdist-stats-shards requires --xdist-stats-shard in range 0..{}".format(
+                    self.shards - 1
+                )
+            )
+        self.shard = int(shard_id)
+
+    def get_plan(self, names):
+        """
+        Parameters
+        ----------
+        names: List[str]
+
+        Returns
+        -------
+        List[List[str]]
+        """
+        histories = read_histories(self.config.getoption("--xdist-stats-history") or [])
+        coupled_path = self.config.getoption("--xdist-stats-coupled")
+        coupled = read_coupled(coupled_path) if coupled_path else []
+        return plan_shards(names, get_durations(histories), self.shards, coupled)
+
+    @pytest.hookimpl(hookwrapper=True, trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        """
+        Parameters
+        ----------
+        config: _pytest.config.Config
+        items : List[pytest.Item]
+        """
+        selected = set(self.get_plan([item.nodeid for item in items])[self.shard])
+        deselected = [item for item in items if item.nodeid not in selected]
+        items[:] = [item for item in items if item.nodeid in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        yield
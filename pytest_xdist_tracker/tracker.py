@@ -1,11 +1,23 @@
 from __future__ import absolute_import
 
 import io
+import math
+import numbers
+import os
+from array import array
 
 import pytest
+import six
 from six.moves import urllib_parse
 
+from pytest_xdist_tracker.archive import RunArchive, is_reference
+from pytest_xdist_tracker.nodeids import NodeIdStore
+
 ENCODING = "utf-8"
+# fixtures with these scopes are shared between tests of different modules
+SHARED_SCOPES = ("session", "package")
+# test without reports (duration is not written to the artifact)
+NO_DURATION = float("nan")
 
 
 def is_xdist_worker(config):
@@ -43,6 +55,119 @@ def get_xdist_worker_id(config):
     return "master"
 
 
+def get_param_id(item, name, fixture_def):
+    """
+    Id of the param which the parametrized fixture got for the test,
+    the same way as pytest makes it for the test name
+
+    Parameters
+    ----------
+    item: _pytest.main.Item
+    name: str
+        "db"
+    fixture_def: _pytest.fixtures.FixtureDef
+
+    Returns
+    -------
+    Optional[str]
+        "pg" for test `test_one[pg]`, `None` when fixture is not parametrized
+    """
+    callspec = getattr(item, "callspec", None)
+    if callspec is None or name not in callspec.params:
+        return None
+    param = callspec.params[name]
+    param_index = callspec.indices.get(name, 0)
+    ids = fixture_def.ids
+    if callable(ids):
+        param_id = ids(param)
+    elif ids and param_index < len(ids):
+        param_id = ids[param_index]
+    else:
+        param_id = None
+    if param_id is None:
+        if param is None or isinstance(param, (six.string_types, numbers.Number)):
+            param_id = param
+        else:
+            param_id = "{}{}".format(name, param_index)
+    # separators of the artifact line must not appear inside
+    return urllib_parse.quote(six.text_type(param_id), safe="")
+
+
+def get_fixtures(item):
+    """
+    Non function scoped fixtures from the fixture closure of the test,
+    only they could keep state between tests.
+    Parametrized fixtures keep param id, so every instance is distinguished
+
+    Parameters
+    ----------
+    item: _pytest.main.Item
+
+    Returns
+    -------
+    List[str]
+        ["session:db[pg]", "module:client", ...]
+    """
+    fixture_info = getattr(item, "_fixtureinfo", None)
+    if fixture_info is None:
+        return []
+    fixtures = []
+    for name in item.fixturenames:
+        fixture_defs = fixture_info.name2fixturedefs.get(name)
+        if not fixture_defs or fixture_defs[-1].scope == "function":
+            continue
+        fixture = "{}:{}".format(fixture_defs[-1].scope, name)
+        param_id = get_param_id(item, name, fixture_defs[-1])
+        if param_id is not None:
+            fixture = "{}[{}]".format(fixture, param_id)
+        fixtures.append(fixture)
+    return fixtures
+
+
+def format_line(name, fixtures, duration=None):
+    """
+    Parameters
+    ----------
+    name: str
+        "tests/test_one.py%3A%3Atest_one"
+    fixtures: List[str]
+        ["session:db", "module:client"]
+    duration: Optional[float]
+        seconds spent on setup, call and teardown of the test
+
+    Returns
+    -------
+    str
+        "tests/test_one.py%3A%3Atest_one\tsession:db,module:client\t0.125"
+    """
+    if duration is not None:
+        return "{}\t{}\t{:.3f}".format(name, ",".join(fixtures or []), duration)
+    if not fixtures:
+        return name
+    return "{}\t{}".format(name, ",".join(fixtures))
+
+
+def parse_line(line):
+    """
+    Parameters
+    ----------
+    line: str
+        "tests/test_one.py%3A%3Atest_one\tsession:db,module:client\t0.125"
+
+    Returns
+    -------
+    Tuple[str, List[str], Optional[float]]
+        ("tests/test_one.py::test_one", ["session:db", "module:client"], 0.125)
+    """
+    name, _, rest = line.rstrip("\n").partition("\t")
+    fixtures, _, duration = rest.partition("\t")
+    return (
+        urllib_parse.unquote(name),
+        [f for f in fixtures.split(",") if f],
+        float(duration) if duration else None,
+    )
+
+
 class TestTracker(object):
     """
     Plugin track tests which run in particular xdist node
@@ -53,7 +178,18 @@ class TestTracker(object):
     def __init__(self, config):
         self.config = config
         self.is_loadfile = self.config.getoption("dist") == "loadfile"
-        self.storage = []
+        self.storage = NodeIdStore()
+        # shared fixtures and durations of tests in the same order as `storage`
+        self.fixtures = []
+        self.durations = array("d")
+        # durations of tests which are not added yet (setup phase)
+        self.pending_durations = {}
+        # the same fixtures are shared by many tests, so keep only one tuple of them
+        self.fixture_sets = {}
+        self.failed = False
+        # worker id -> {"segment": digest, "failed": bool}, collected on master node
+        self.workers = {}
+        self.archive = RunArchive.from_config(config)
 
     def get_name(self, item):
         """
@@ -64,7 +200,7 @@ class TestTracker(object):
 
         Parameters
         -----------
-        item : _pytest.main.Item
+        item : Union[_pytest.main.Item, _pytest.reports.TestReport]
 
         Returns
         -------
@@ -83,25 +219,30 @@ class TestTracker(object):
         item : _pytest.main.Item
         """
         name = self.get_name(item)
-        if name not in self.storage:
-            self.storage.append(name)
+        if self.storage.add(name):
+            fixtures = () if self.is_loadfile else tuple(get_fixtures(item))
+            self.fixtures.append(self.fixture_sets.setdefault(fixtures, fixtures))
+            self.durations.append(self.pending_durations.pop(name, NO_DURATION))
 
     @property
     def file_path(self):
         """
-        Making path base on passed patter and worker id
+        Making path base on passed patter, shard id (when passed) and worker id
 
         Returns
         -------
         str
             "xdist_stats_worker_gw1.txt"
             "xdist_stats_worker_gw2.txt"
+            "xdist_stats_shard_1_worker_gw2.txt"
             ...
         """
         worker_id = get_xdist_worker_id(self.config)
-        file_name = "{}_worker_{}.txt".format(
-            self.config.getoption("--xdist-stats"), worker_id
-        )
+        pattern = self.config.getoption("--xdist-stats")
+        shard_id = self.config.getoption("--xdist-stats-shard")
+        if shard_id is not None:
+            pattern = "{}_shard_{}".format(pattern, shard_id)
+        file_name = "{}_worker_{}.txt".format(pattern, worker_id)
         return str(self.config.rootdir / file_name)
 
     def store(self):
@@ -110,9 +251,30 @@ class TestTracker(object):
         tests separate by new line
         """
 
+        content = "\n".join(
+            format_line(
+                name,
+                fixtures,
+                None if math.isnan(duration) else duration,
+            )
+            for name, fixtures, duration in zip(
+                self.storage, self.fixtures, self.durations
+            )
+        )
         with io.open(self.file_path, "wb") as file:
-            content = "\n".join(self.storage)
             file.write(content.encode(ENCODING))
+        if self.archive is not None:
+            # durations differ from run to run, without them
+            # runs with the same history share the same segment
+            history = "\n".join(
+                format_line(name, fixtures)
+                for name, fixtures in zip(self.storage, self.fixtures)
+            )
+            # master node registers the run when all workers are done
+            self.config.workeroutput["xdist_stats"] = {
+                "segment": self.archive.add_segment(history),
+                "failed": self.failed,
+            }
 
     @pytest.hookimpl(hookwrapper=True, trylast=True)
     def pytest_sessionfinish(self):
@@ -124,8 +286,46 @@ class TestTracker(object):
         """
         if is_xdist_worker(self.config):
             self.store()
+        elif self.archive is not None and self.workers:
+            self.archive.add_run(self.workers)
         yield
 
+    def pytest_testnodedown(self, node):
+        """
+        Collects archived segment of the finished xdist node (only on master node)
+
+        Parameters
+        ----------
+        node: xdist.workermanage.WorkerController
+        """
+        info = getattr(node, "workeroutput", {}).get("xdist_stats")
+        if info:
+            self.workers[node.workerinput["workerid"]] = info
+
+    def pytest_runtest_logreport(self, report):
+        """
+        Parameters
+        ----------
+        report : _pytest.reports.TestReport
+        """
+        name = self.get_name(report)
+        try:
+            index = self.storage.index(name)
+        except ValueError:
+            if report.when == "teardown":
+                # test was not executed (e.g. skipped)
+                self.pending_durations.pop(name, None)
+            else:
+                self.pending_durations[name] = (
+                    self.pending_durations.get(name, 0.0) + report.duration
+                )
+        else:
+            if math.isnan(self.durations[index]):
+                self.durations[index] = 0.0
+            self.durations[index] += report.duration
+        if report.failed:
+            self.failed = True
+
     @pytest.hookimpl(hookwrapper=True, trylast=True)
     def pytest_runtest_call(self, item):
         """
@@ -149,6 +349,8 @@ class TestRunner(object):
         config: _pytest.config.Config
         """
         self._target_tests = None
+        # shared fixtures of tests in the same order as `target_tests`, read from the artifact
+        self.fixtures = []
         self.config = config
         # patch of passed arguments `tests/...` to reduce collection runtime
         self.config.args[:] = self.target_test_modules
@@ -159,7 +361,7 @@ class TestRunner(object):
 
         Returns
         -------
-        List[str]
+        NodeIdStore
             [
                 "tests/backend/test_one.py::test_one",
                 "tests/backend/test_one.py::test_two",
@@ -167,20 +369,98 @@ class TestRunner(object):
             ]
         """
         file_path = self.config.getoption("--from-xdist-stats")
-        test_cases = []
-        with io.open(file_path, "rb") as file:
-            for line in file:
-                test_cases.append(
-                    urllib_parse.unquote(line.decode(ENCODING).rstrip("\n"))
-                )
+        if not os.path.isfile(file_path) and is_reference(file_path):
+            lines = self.read_archived_tests(file_path)
+        else:
+            with io.open(file_path, "rb") as file:
+                lines = [line.decode(ENCODING) for line in file]
+
+        test_cases = NodeIdStore()
+        fixture_sets = {}
+        self.fixtures = []
+        for line in lines:
+            test_case, fixtures, _ = parse_line(line)
+            if test_cases.add(test_case):
+                fixtures = tuple(fixtures)
+                self.fixtures.append(fixture_sets.setdefault(fixtures, fixtures))
         return test_cases
 
+    def read_archived_tests(self, reference):
+        """
+        Parameters
+        ----------
+        reference: str
+            "last-failed:gw3"
+
+        Returns
+        -------
+        List[str]
+            lines of the archived artifact
+        """
+        archive = RunArchive.from_config(self.config)
+        if archive is None:
+            raise pytest.UsageError(
+                "Can not read `{}`, archive of runs is disabled "
+                "(via `--xdist-stats-keep-runs=0` or `-p no:cacheprovider`)".format(
+                    reference
+                )
+            )
+        lines = archive.read(reference)
+        if lines is None:
+            raise pytest.UsageError("There is no stored run for `{}`".format(reference))
+        return lines
+
+    def prune(self, test_cases, target):
+        """
+        Drops tests which can not affect the target one:
+        executed after it or do not share the module or session/package scoped fixtures
+        (the same instance of parametrized one) with it
+
+        Parameters
+        ----------
+        test_cases: NodeIdStore
+        target: str
+            "tests/backend/test_one.py::test_two"
+
+        Returns
+        -------
+        NodeIdStore
+            [
+                "tests/backend/test_one.py::test_one",
+                "tests/backend/test_one.py::test_two",
+            ]
+        """
+        if target not in test_cases:
+            raise pytest.UsageError(
+                "Test `{}` was not found in `{}`".format(
+                    target, self.config.getoption("--from-xdist-stats")
+                )
+            )
+        target_index = test_cases.index(target)
+        module = target.split("::")[0]
+        shared = {
+            fixture
+            for fixture in self.fixtures[target_index]
+            if fixture.split(":")[0] in SHARED_SCOPES
+        }
+        kept = [
+            index
+            for index, test_case in enumerate(test_cases)
+            if index < target_index
+            and (
+                test_case.split("::")[0] == module
+                or shared.intersection(self.fixtures[index])
+            )
+        ] + [target_index]
+        self.fixtures = [self.fixtures[index] for index in kept]
+        return NodeIdStore(test_cases[index] for index in kept)
+
     @property
     def target_tests(self):
         """
         Returns
         -------
-        List[str]
+        NodeIdStore
             [
                 "tests/backend/test_one.py::test_one",
                 "tests/backend/test_one.py::test_two",
@@ -189,6 +469,12 @@ class TestRunner(object):
         """
         if self._target_tests is None:
             self._target_tests = self.read_target_tests()
+            target = self.config.getoption("--xdist-stats-prune-target")
+            is_prune = target or self.config.getoption("--xdist-stats-prune")
+            if is_prune and self._target_tests:
+                self._target_tests = self.prune(
+                    self._target_tests, target or self._target_tests[-1]
+                )
         return self._target_tests
 
     @property
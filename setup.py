@@ -24,7 +24,10 @@ setup(
     url="https://github.com/DKorytkin/pytest-xdist-tracker",
     keywords=["py.test", "pytest", "xdist plugin", "tracker", "failed tests"],
     py_modules=[
+        "pytest_xdist_tracker.archive",
+        "pytest_xdist_tracker.nodeids",
         "pytest_xdist_tracker.plugin",
+        "pytest_xdist_tracker.shards",
         "pytest_xdist_tracker.tracker",
     ],
     packages=find_packages(exclude=["tests*"]),
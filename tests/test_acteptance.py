@@ -81,3 +81,178 @@ def test_run_tests_not_from_artifact(target_tests):
     assert result["passed"] == 1
     assert result["skipped"] == 1
     assert result["failed"] == 2
+
+
+def test_run_tests_from_archived_run(target_tests):
+    report = target_tests.runpytest("-n", "1")
+    assert report.parseoutcomes()["failed"] == 2
+    report = target_tests.runpytest("--from-xdist-stats", "last-failed:gw0")
+    result = report.parseoutcomes()
+    assert result["passed"] == 1
+    assert result["failed"] == 2
+
+
+def test_run_archived_run_with_disabled_archive(target_tests):
+    target_tests.runpytest("-n", "1")
+    report = target_tests.runpytest(
+        "--from-xdist-stats", "last:gw0", "--xdist-stats-keep-runs", "0"
+    )
+    assert report.ret != 0
+    report.stderr.fnmatch_lines(["*last:gw0*archive of runs is disabled*"])
+    report = target_tests.runpytest(
+        "--from-xdist-stats", "last:gw0", "-p", "no:cacheprovider"
+    )
+    assert report.ret != 0
+    report.stderr.fnmatch_lines(["*last:gw0*archive of runs is disabled*"])
+
+
+def test_run_tests_from_artifact_without_archive(target_tests):
+    f = target_tests.maketxtfile(
+        "test_run_tests_from_artifact_without_archive.py::test_ok"
+    )
+    report = target_tests.runpytest("--from-xdist-stats", str(f))
+    assert report.parseoutcomes() == {"passed": 1}
+    assert not target_tests.tmpdir.join(".pytest_cache", "d", "xdist_tracker").check()
+
+
+def test_not_archive_runs(target_tests):
+    target_tests.runpytest("-n", "1", "--xdist-stats-keep-runs", "0")
+    report = target_tests.runpytest("--from-xdist-stats", "last:gw0")
+    assert report.ret != 0
+    report.stderr.fnmatch_lines(["*no stored run*last:gw0*"])
+
+
+def test_run_pruned_tests_from_artifact(testdir):
+    testdir.makeconftest(
+        """
+            import pytest
+
+            @pytest.fixture(scope="session")
+            def db():
+                return {}
+        """
+    )
+    testdir.makepyfile(
+        test_one="""
+            def test_dirty(db):
+                db["dirty"] = True
+
+            def test_ok():
+                pass
+
+            def test_coupled(db):
+                assert not db
+        """,
+        test_two="""
+            def test_other():
+                pass
+        """,
+    )
+    report = testdir.runpytest("-n", "1", "test_one.py")
+    assert report.parseoutcomes()["failed"] == 1
+    lines = [
+        "test_two.py::test_other",
+        "test_one.py::test_dirty\tsession:db",
+        "test_one.py::test_ok",
+        "test_one.py::test_coupled\tsession:db",
+    ]
+    f = testdir.maketxtfile("\n".join(lines))
+    report = testdir.runpytest(
+        "--from-xdist-stats",
+        str(f),
+        "--xdist-stats-prune-target=test_one.py::test_dirty",
+    )
+    assert report.parseoutcomes() == {"passed": 1}
+    # positional path after the flag is not taken as the target
+    report = testdir.runpytest(
+        "--from-xdist-stats", str(f), "--xdist-stats-prune", "test_one.py"
+    )
+    assert report.parseoutcomes() == {"passed": 2, "failed": 1}
+    artifact = testdir.tmpdir.join("xdist_stats_worker_gw0.txt").read()
+    assert "test_dirty\tsession:db" in artifact
+
+
+def test_run_pruned_tests_with_parametrized_fixture(testdir):
+    testdir.makeconftest(
+        """
+            import pytest
+
+            @pytest.fixture(scope="session", params=["pg", "sqlite"])
+            def db(request):
+                return request.param
+        """
+    )
+    testdir.makepyfile(
+        test_one="""
+            def test_write(db):
+                pass
+        """,
+        test_two="""
+            def test_read(db):
+                pass
+        """,
+    )
+    testdir.runpytest("-n", "1")
+    artifact = testdir.tmpdir.join("xdist_stats_worker_gw0.txt").read()
+    assert "test_write%5Bpg%5D\tsession:db[pg]" in artifact
+    assert "test_write%5Bsqlite%5D\tsession:db[sqlite]" in artifact
+    report = testdir.runpytest(
+        "--from-xdist-stats",
+        "xdist_stats_worker_gw0.txt",
+        "--xdist-stats-prune-target=test_one.py::test_write[sqlite]",
+        "-v",
+    )
+    # `test_read[pg]` does not share the instance of `db` with the target
+    assert report.parseoutcomes() == {"passed": 2}
+    report.stdout.fnmatch_lines(
+        ["*test_write?pg? PASSED*", "*test_write?sqlite? PASSED*"]
+    )
+
+
+def test_run_shards(testdir):
+    testdir.makepyfile(
+        test_one="""
+            def test_slow():
+                pass
+
+            def test_fast():
+                pass
+        """,
+        test_two="""
+            def test_coupled_a():
+                pass
+
+            def test_coupled_b():
+                pass
+        """,
+    )
+    report = testdir.runpytest("-n", "2", "--xdist-stats-shard", "0")
+    assert report.parseoutcomes()["passed"] == 4
+    assert testdir.tmpdir.join("xdist_stats_shard_0_worker_gw0.txt").isfile()
+    assert testdir.tmpdir.join("xdist_stats_shard_0_worker_gw1.txt").isfile()
+
+    testdir.maketxtfile(
+        history="\n".join(
+            [
+                "test_one.py%3A%3Atest_slow\t\t10.0",
+                "test_one.py%3A%3Atest_fast\t\t1.0",
+                "test_two.py%3A%3Atest_coupled_a\t\t1.0",
+                "test_two.py%3A%3Atest_coupled_b\t\t1.0",
+            ]
+        ),
+        coupled="test_one.py::test_fast\ttest_two.py::test_coupled_b",
+    )
+    options = [
+        "--xdist-stats-shards=2",
+        "--xdist-stats-history=history.txt",
+        "--xdist-stats-coupled=coupled.txt",
+        "-v",
+    ]
+    report = testdir.runpytest("--xdist-stats-shard=0", *options)
+    report.stdout.fnmatch_lines(["*test_slow PASSED*"])
+    assert report.parseoutcomes() == {"passed": 1, "deselected": 3}
+    report = testdir.runpytest("--xdist-stats-shard=1", *options)
+    report.stdout.fnmatch_lines(
+        ["*test_fast PASSED*", "*test_coupled_a PASSED*", "*test_coupled_b PASSED*"]
+    )
+    assert report.parseoutcomes() == {"passed": 3, "deselected": 1}
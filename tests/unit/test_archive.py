@@ -0,0 +1,178 @@
+import os
+
+import pytest
+from six.moves import urllib_parse
+
+from pytest_xdist_tracker.archive import RunArchive, is_reference
+
+NODEIDS = [
+    urllib_parse.quote("tests/backend/unit/test_awesome.py::test_one[a b]"),
+    urllib_parse.quote("tests/backend/unit/test_awesome.py::test_two") + "\tsession:db",
+]
+
+
+def make_content(nodeids):
+    return "\n".join(nodeids)
+
+
+@pytest.fixture
+def archive(testdir):
+    config = testdir.parseconfigure()
+    return RunArchive(config.cache, keep_runs=2, max_size=1)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    (
+        ("last", False),
+        ("last-failed", True),
+        ("last:gw1", True),
+        ("last-failed:gw12", True),
+        ("20210101-120000-1234:gw0", True),
+        ("xdist_stats_worker_gw0.txt", False),
+        ("artifacts/last:gw0", False),
+        ("file_not_exist.txt", False),
+    ),
+)
+def test_is_reference(value, expected):
+    assert is_reference(value) is expected
+
+
+def test_from_config(testdir):
+    config = testdir.parseconfigure("--xdist-stats-keep-runs", "3")
+    archive = RunArchive.from_config(config)
+    assert archive.keep_runs == 3
+    assert archive.max_bytes == 50 * 1024 * 1024
+
+
+def test_from_config_disabled(testdir):
+    config = testdir.parseconfigure("--xdist-stats-keep-runs", "0")
+    assert RunArchive.from_config(config) is None
+
+
+def test_add_segment(archive):
+    digest = archive.add_segment(make_content(NODEIDS))
+    assert os.path.isfile(archive.segment_path(digest))
+    assert archive.read_segment(digest) == NODEIDS
+
+
+def test_add_segment_deduplicated(archive):
+    first = archive.add_segment(make_content(NODEIDS))
+    second = archive.add_segment(make_content(NODEIDS))
+    other = archive.add_segment(make_content(NODEIDS[:1]))
+    assert first == second
+    assert first != other
+
+
+def test_read_last(archive):
+    digest = archive.add_segment(make_content(NODEIDS))
+    archive.add_run({"gw0": {"segment": digest, "failed": False}})
+    assert archive.read("last:gw0") == NODEIDS
+
+
+def test_read_last_failed(archive):
+    passed = archive.add_segment(make_content(NODEIDS[1:]))
+    failed = archive.add_segment(make_content(NODEIDS))
+    archive.add_run(
+        {
+            "gw0": {"segment": passed, "failed": False},
+            "gw1": {"segment": failed, "failed": True},
+        },
+        run_id="run-1",
+    )
+    archive.add_run({"gw0": {"segment": passed, "failed": False}}, run_id="run-2")
+    assert archive.read("last-failed") == NODEIDS
+    assert archive.read("last-failed:gw0") == NODEIDS[1:]
+    assert archive.read("run-1:gw1") == NODEIDS
+
+
+def test_read_unknown(archive):
+    assert archive.read("xdist_stats_worker_gw0.txt") is None
+    with pytest.raises(pytest.UsageError):
+        archive.read("last:gw0")
+
+
+def test_read_unknown_worker(archive):
+    digest = archive.add_segment(make_content(NODEIDS))
+    archive.add_run({"gw0": {"segment": digest, "failed": False}})
+    with pytest.raises(pytest.UsageError):
+        archive.read("last:gw5")
+
+
+def test_evict_by_runs(archive):
+    digests = []
+    for idx in range(3):
+        digest = archive.add_segment(make_content(NODEIDS[:1] * (idx + 1)))
+        archive.add_run(
+            {"gw0": {"segment": digest, "failed": idx == 0}},
+            run_id="run-{}".format(idx),
+        )
+        digests.append(digest)
+    index = archive.load_index()
+    assert sorted(index["runs"]) == ["run-1", "run-2"]
+    assert index["last"] == "run-2"
+    assert index["last_failed"] is None
+    assert not os.path.isfile(archive.segment_path(digests[0]))
+    assert os.path.isfile(archive.segment_path(digests[2]))
+
+
+def test_evict_least_recently_used(archive):
+    for idx in range(2):
+        digest = archive.add_segment(make_content(NODEIDS[: idx + 1]))
+        archive.add_run(
+            {"gw0": {"segment": digest, "failed": False}},
+            run_id="run-{}".format(idx),
+        )
+    archive.read("run-0:gw0")
+    digest = archive.add_segment(make_content(NODEIDS[1:]))
+    archive.add_run({"gw0": {"segment": digest, "failed": False}}, run_id="run-2")
+    assert sorted(archive.load_index()["runs"]) == ["run-0", "run-2"]
+
+
+def test_evict_by_size(archive):
+    archive.max_bytes = 1
+    for idx in range(2):
+        digest = archive.add_segment(make_content(NODEIDS[: idx + 1]))
+        archive.add_run(
+            {"gw0": {"segment": digest, "failed": False}},
+            run_id="run-{}".format(idx),
+        )
+    # the current run always kept
+    assert list(archive.load_index()["runs"]) == ["run-1"]
+
+
+def test_evict_not_registered_segments(archive):
+    # written by worker of the interrupted run, master never registered it
+    orphan = archive.add_segment(make_content(NODEIDS))
+    stale_tmp = archive.segment_path(orphan) + ".123.tmp"
+    fresh_tmp = archive.segment_path(orphan) + ".456.tmp"
+    for path in (stale_tmp, fresh_tmp):
+        with open(path, "wb") as file:
+            file.write(b"data")
+    os.utime(stale_tmp, (0, 0))
+    digest = archive.add_segment(make_content(NODEIDS[:1]))
+    archive.add_run({"gw0": {"segment": digest, "failed": False}})
+    assert not os.path.isfile(archive.segment_path(orphan))
+    assert not os.path.isfile(stale_tmp)
+    assert os.path.isfile(fresh_tmp)
+    assert os.path.isfile(archive.segment_path(digest))
+
+
+def test_read_removed_segment(archive):
+    digest = archive.add_segment(make_content(NODEIDS))
+    archive.add_run({"gw0": {"segment": digest, "failed": False}})
+    os.remove(archive.segment_path(digest))
+    with pytest.raises(pytest.UsageError, match="removed from the archive"):
+        archive.read("last:gw0")
+
+
+def test_evict_by_size_with_pending(archive):
+    first = archive.add_segment(make_content(NODEIDS))
+    archive.add_run({"gw0": {"segment": first, "failed": False}}, run_id="run-0")
+    archive.max_bytes = os.path.getsize(archive.segment_path(first)) * 3
+    # segment of the concurrent run which is still being written
+    with open(archive.segment_path(first) + ".123.tmp", "wb") as file:
+        file.write(b"x" * archive.max_bytes)
+    second = archive.add_segment(make_content(NODEIDS[:1]))
+    archive.add_run({"gw0": {"segment": second, "failed": False}}, run_id="run-1")
+    assert list(archive.load_index()["runs"]) == ["run-1"]
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from pytest_xdist_tracker.nodeids import (
+    NodeIdStore,
+    common_prefix_length,
+    read_varint,
+    write_varint,
+)
+
+NODEIDS = [
+    "tests/backend/unit/test_awesome.py::test_one[{}]".format(idx) for idx in range(40)
+] + [
+    "tests/backend/unit/test_other.py::TestCase::test_unicode[ключ]",
+    "tests/backend/unit/test_other.py::TestCase::test_unicode[ключи]",
+    "tests/test_short.py::test",
+]
+
+
+@pytest.fixture
+def store():
+    return NodeIdStore(NODEIDS)
+
+
+@pytest.mark.parametrize(
+    "first, second, expected",
+    ((b"", b"abc", 0), (b"abc", b"abd", 2), (b"abc", b"abc", 3), (b"ab", b"abc", 2)),
+)
+def test_common_prefix_length(first, second, expected):
+    assert common_prefix_length(first, second) == expected
+
+
+@pytest.mark.parametrize("value", (0, 1, 127, 128, 300, 2**35))
+def test_varint(value):
+    buffer = bytearray(b"x")
+    write_varint(buffer, value)
+    assert read_varint(buffer, 1) == (value, len(buffer))
+
+
+def test_iter(store):
+    assert len(store) == len(NODEIDS)
+    assert list(store) == NODEIDS
+
+
+def test_empty():
+    store = NodeIdStore()
+    assert len(store) == 0
+    assert list(store) == []
+    assert NODEIDS[0] not in store
+
+
+def test_add(store):
+    assert not store.add(NODEIDS[3])
+    assert store.add("tests/test_new.py::test_new")
+    assert len(store) == len(NODEIDS) + 1
+    assert list(store) == NODEIDS + ["tests/test_new.py::test_new"]
+
+
+def test_contains(store):
+    assert all(nodeid in store for nodeid in NODEIDS)
+    assert "tests/backend/unit/test_awesome.py::test_one[40]" not in store
+    assert "tests/backend/unit/test_awesome.py::test_one" not in store
+
+
+def test_getitem(store):
+    assert [store[idx] for idx in range(len(NODEIDS))] == NODEIDS
+    assert store[-1] == NODEIDS[-1]
+    with pytest.raises(IndexError):
+        store[len(NODEIDS)]
+
+
+def test_index(store):
+    assert [store.index(nodeid) for nodeid in NODEIDS] == list(range(len(NODEIDS)))
+    with pytest.raises(ValueError):
+        store.index("tests/test_absent.py::test")
+
+
+def test_front_coding(store):
+    encoded = len(store._data) + sum(len(n.encode("utf-8")) for n in store._tail)
+    assert encoded < sum(len(nodeid.encode("utf-8")) for nodeid in NODEIDS) / 2
+
+
+def test_getitem_across_blocks(store):
+    for idx in (0, 20, 1, 35, 17, 41, 2):
+        assert store[idx] == NODEIDS[idx]
+
+
+def test_decode_nodeid(store):
+    for block in range(len(store._offsets)):
+        decoded = [
+            store._decode_nodeid(block, position)
+            for position in range(NodeIdStore.BLOCK_SIZE)
+        ]
+        assert decoded == store._decode_block(block)
+
+
+def test_index_out_of_order(store):
+    for idx in (33, 5, 20, 21, 22, 0, 42, 16, 31):
+        assert store.index(NODEIDS[idx]) == idx
+    # the whole block is cached only for lookups in order of adding
+    assert store._cached_block == 1
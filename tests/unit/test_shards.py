@@ -0,0 +1,124 @@
+import os
+
+import pytest
+from six.moves import urllib_parse
+
+from pytest_xdist_tracker import shards
+from pytest_xdist_tracker.tracker import format_line
+
+NAMES = ["tests/test_{}.py::test_{}".format(idx, idx) for idx in range(6)]
+
+
+@pytest.fixture
+def histories(tmpdir):
+    artifacts = {
+        "xdist_stats_shard_0_worker_gw0.txt": [(NAMES[0], 4.0), (NAMES[1], 1.0)],
+        "xdist_stats_shard_0_worker_gw1.txt": [(NAMES[2], 2.0)],
+        "xdist_stats_shard_1_worker_gw0.txt": [(NAMES[0], 2.0), (NAMES[3], None)],
+    }
+    for file_name, tests in artifacts.items():
+        tmpdir.join(file_name).write(
+            "\n".join(
+                format_line(urllib_parse.quote(name), [], duration)
+                for name, duration in tests
+            )
+        )
+    return str(tmpdir / "xdist_stats_shard_*_worker_gw*.txt")
+
+
+def test_read_histories(histories):
+    result = shards.read_histories([histories])
+    assert [os.path.basename(path) for path in result] == [
+        "xdist_stats_shard_0_worker_gw0.txt",
+        "xdist_stats_shard_0_worker_gw1.txt",
+        "xdist_stats_shard_1_worker_gw0.txt",
+    ]
+    assert result[histories.replace("*_worker_gw*", "1_worker_gw0")] == [
+        (NAMES[0], [], 2.0),
+        (NAMES[3], [], None),
+    ]
+
+
+def test_get_durations(histories):
+    assert shards.get_durations(shards.read_histories([histories])) == {
+        NAMES[0]: 3.0,
+        NAMES[1]: 1.0,
+        NAMES[2]: 2.0,
+    }
+
+
+def test_read_histories_of_several_runs(tmpdir):
+    for run, duration in (("run1", 1.0), ("run2", 3.0)):
+        tmpdir.mkdir(run).join("xdist_stats_shard_0_worker_gw0.txt").write(
+            format_line(urllib_parse.quote(NAMES[0]), [], duration)
+        )
+    result = shards.read_histories([str(tmpdir / "*" / "xdist_stats_*.txt")])
+    assert len(result) == 2
+    assert shards.get_durations(result) == {NAMES[0]: 2.0}
+
+
+def test_read_coupled(tmpdir):
+    path = tmpdir.join("coupled.txt")
+    path.write("{}\t{}\n\n{}\t{}\n".format(NAMES[0], NAMES[1], NAMES[2], NAMES[5]))
+    assert shards.read_coupled(str(path)) == [
+        [NAMES[0], NAMES[1]],
+        [NAMES[2], NAMES[5]],
+    ]
+
+
+def test_plan_shards():
+    durations = {NAMES[0]: 5.0, NAMES[1]: 3.0, NAMES[2]: 2.0, NAMES[3]: 2.0}
+    assert shards.plan_shards(NAMES[:4], durations, 2) == [
+        [NAMES[0], NAMES[3]],
+        [NAMES[1], NAMES[2]],
+    ]
+
+
+def test_plan_shards_unknown_durations():
+    durations = {NAMES[0]: 3.0, NAMES[1]: 1.0}
+    # unknown tests take the mean duration (2.0)
+    assert shards.plan_shards(NAMES[:4], durations, 2) == [
+        [NAMES[0], NAMES[1]],
+        [NAMES[2], NAMES[3]],
+    ]
+
+
+def test_plan_shards_coupled():
+    durations = {name: 1.0 for name in NAMES}
+    coupled = [[NAMES[0], NAMES[5]], [NAMES[1], "tests/test_absent.py::test_x"]]
+    plan = shards.plan_shards(NAMES, durations, 3, coupled)
+    assert sorted(name for shard in plan for name in shard) == sorted(NAMES)
+    assert any(NAMES[0] in shard and NAMES[5] in shard for shard in plan)
+    assert [len(shard) for shard in plan] == [2, 2, 2]
+
+
+def test_plan_shards_deterministic():
+    durations = {name: 1.0 for name in NAMES}
+    assert shards.plan_shards(NAMES, durations, 4) == shards.plan_shards(
+        NAMES, durations, 4
+    )
+    assert shards.plan_shards(NAMES, durations, 4) == [
+        [NAMES[0], NAMES[4]],
+        [NAMES[1], NAMES[5]],
+        [NAMES[2]],
+        [NAMES[3]],
+    ]
+
+
+@pytest.mark.parametrize("shard", (None, "x", "2"))
+def test_sharder_wrong_shard(testdir, shard):
+    args = ["--xdist-stats-shards", "2"]
+    if shard is not None:
+        args.extend(["--xdist-stats-shard", shard])
+    with pytest.raises(pytest.UsageError):
+        testdir.parseconfigure(*args)
+
+
+def test_sharder(testdir):
+    config = testdir.parseconfigure(
+        "--xdist-stats-shards", "2", "--xdist-stats-shard", "1"
+    )
+    sharder = config.pluginmanager.getplugin("xdist_sharder")
+    assert isinstance(sharder, shards.TestSharder)
+    assert sharder.shards == 2
+    assert sharder.shard == 1
@@ -9,8 +9,10 @@ import pytest
 from _pytest.config import Config
 from six.moves import urllib_parse
 
+from pytest_xdist_tracker.archive import RunArchive
 from pytest_xdist_tracker.tracker import TestRunner as Runner
 from pytest_xdist_tracker.tracker import TestTracker as Tracker
+from pytest_xdist_tracker.tracker import format_line, get_fixtures, parse_line
 
 try:
     FileNotFoundError
@@ -34,11 +36,96 @@ def config(tmpdir):
     return c
 
 
+def create_fixture_def(scope, ids=None):
+    fixture_def = mock.Mock()
+    fixture_def.scope = scope
+    fixture_def.ids = ids
+    return fixture_def
+
+
 @pytest.fixture
 def node():
     return create_pytest_test_item(0)
 
 
+@pytest.fixture
+def node_with_fixtures():
+    node = mock.Mock()
+    node.nodeid = u"tests/backend/unit/test_awesome.py::test_fixtures"
+    node.fixturenames = ["db", "client", "tmpdir", "request"]
+    node._fixtureinfo.name2fixturedefs = {
+        "db": [create_fixture_def("session")],
+        "client": [create_fixture_def("function"), create_fixture_def("module")],
+        "tmpdir": [create_fixture_def("function")],
+    }
+    # test is not parametrized
+    del node.callspec
+    return node
+
+
+def test_get_fixtures(node_with_fixtures):
+    assert get_fixtures(node_with_fixtures) == ["session:db", "module:client"]
+
+
+@pytest.mark.parametrize(
+    "param, ids, expected",
+    (
+        ("pg", None, "session:db[pg]"),
+        (2, None, "session:db[2]"),
+        (object(), None, "session:db[db1]"),
+        ("pg", ["postgres", "lite"], "session:db[lite]"),
+        ("pg", lambda param: param.upper(), "session:db[PG]"),
+        ("a,b", None, "session:db[a%2Cb]"),
+    ),
+)
+def test_get_fixtures_parametrized(node_with_fixtures, param, ids, expected):
+    node_with_fixtures.callspec = mock.Mock()
+    node_with_fixtures.callspec.params = {"db": param}
+    node_with_fixtures.callspec.indices = {"db": 1}
+    node_with_fixtures._fixtureinfo.name2fixturedefs["db"] = [
+        create_fixture_def("session", ids)
+    ]
+    assert get_fixtures(node_with_fixtures) == [expected, "module:client"]
+
+
+def test_get_fixtures_without_fixture_info(node):
+    assert get_fixtures(node) == []
+
+
+@pytest.mark.parametrize(
+    "name, fixtures, duration, line",
+    (
+        (
+            "tests/test_one.py%3A%3Atest_one",
+            [],
+            None,
+            "tests/test_one.py%3A%3Atest_one",
+        ),
+        (
+            "tests/test_one.py%3A%3Atest_one",
+            ["session:db", "module:client"],
+            None,
+            "tests/test_one.py%3A%3Atest_one\tsession:db,module:client",
+        ),
+        (
+            "tests/test_one.py%3A%3Atest_one",
+            [],
+            0.5,
+            "tests/test_one.py%3A%3Atest_one\t\t0.500",
+        ),
+        (
+            "tests/test_one.py%3A%3Atest_one",
+            ["session:db"],
+            1.25,
+            "tests/test_one.py%3A%3Atest_one\tsession:db\t1.250",
+        ),
+    ),
+)
+def test_format_and_parse_line(name, fixtures, duration, line):
+    assert format_line(name, fixtures, duration) == line
+    assert parse_line(line + "\n") == (urllib_parse.unquote(name), fixtures, duration)
+
+
 class TestTracker(object):
     FILE_NAME = "my_super_name"
 
@@ -47,24 +134,28 @@ class TestTracker(object):
         return "{}_worker_gw2.txt".format(self.FILE_NAME)
 
     @pytest.fixture
-    def tracker(self, config):
-        config.getoption.return_value = self.FILE_NAME
+    def options(self):
+        return {"--xdist-stats": self.FILE_NAME, "--xdist-stats-shard": None}
+
+    @pytest.fixture
+    def tracker(self, config, options):
+        config.getoption.side_effect = options.get
         return Tracker(config=config)
 
     def test_instance(self, tracker, config):
         assert tracker.config == config
-        assert tracker.storage == []
+        assert list(tracker.storage) == []
 
     def test_add(self, tracker, node):
         tracker.add(node)
-        assert tracker.storage == [urllib_parse.quote(node.nodeid)]
+        assert list(tracker.storage) == [urllib_parse.quote(node.nodeid)]
 
     def test_add_multiply_times(self, tracker, node):
         tracker.add(node)
         tracker.add(node)
         tracker.add(node)
         assert len(tracker.storage) == 1
-        assert tracker.storage == [urllib_parse.quote(node.nodeid)]
+        assert list(tracker.storage) == [urllib_parse.quote(node.nodeid)]
 
     def test_file_path(self, tracker, expected_file_path):
         assert tracker.file_path.endswith("{}_worker_gw2.txt".format(self.FILE_NAME))
@@ -93,6 +184,64 @@ class TestTracker(object):
             content = file_content.read().strip()
         assert content == ""
 
+    def test_store_with_fixtures(self, tracker, node_with_fixtures, expected_file_path):
+        tracker.add(node_with_fixtures)
+        tracker.store()
+        with open(expected_file_path) as file_content:
+            content = file_content.read().strip()
+        assert parse_line(content) == (
+            node_with_fixtures.nodeid,
+            ["session:db", "module:client"],
+            None,
+        )
+
+    def test_file_path_with_shard(self, tracker, options, tmpdir):
+        options["--xdist-stats-shard"] = "3"
+        assert tracker.file_path == str(
+            tmpdir / "{}_shard_3_worker_gw2.txt".format(self.FILE_NAME)
+        )
+
+    def test_store_with_durations(self, tracker, node, expected_file_path):
+        for duration in (0.25, 1.0, 0.25):
+            report = mock.Mock(nodeid=node.nodeid, duration=duration, failed=False)
+            tracker.pytest_runtest_logreport(report)
+        tracker.add(node)
+        tracker.store()
+        with open(expected_file_path) as file_content:
+            content = file_content.read().strip()
+        assert parse_line(content) == (node.nodeid, [], 1.5)
+        assert not tracker.failed
+
+    def test_store_archive_without_durations(self, testdir, config, options, node):
+        archive = RunArchive(testdir.parseconfigure().cache, keep_runs=2, max_size=1)
+        config.getoption.side_effect = options.get
+        segments = []
+        for duration in (0.1, 0.7):
+            tracker = Tracker(config=config)
+            tracker.archive = archive
+            config.workeroutput = {}
+            report = mock.Mock(nodeid=node.nodeid, duration=duration, failed=False)
+            tracker.pytest_runtest_logreport(report)
+            tracker.add(node)
+            tracker.store()
+            segments.append(config.workeroutput["xdist_stats"]["segment"])
+        assert segments[0] == segments[1]
+        assert archive.read_segment(segments[0]) == [urllib_parse.quote(node.nodeid)]
+
+    def test_pytest_runtest_logreport_not_executed(self, tracker, node):
+        for when in ("setup", "teardown"):
+            report = mock.Mock(
+                nodeid=node.nodeid, duration=0.1, failed=False, when=when
+            )
+            tracker.pytest_runtest_logreport(report)
+        assert tracker.pending_durations == {}
+        assert list(tracker.storage) == []
+
+    def test_pytest_runtest_logreport_failed(self, tracker, node):
+        report = mock.Mock(nodeid=node.nodeid, duration=0.1, failed=True)
+        tracker.pytest_runtest_logreport(report)
+        assert tracker.failed
+
     def test_pytest_sessionfinish(self, expected_file_path, tracker):
         next(tracker.pytest_sessionfinish())
         assert os.path.isfile(expected_file_path), "File not exist"
@@ -104,7 +253,7 @@ class TestTracker(object):
 
     def test_pytest_runtest_call(self, node, tracker):
         next(tracker.pytest_runtest_call(node))
-        assert tracker.storage == [urllib_parse.quote(node.nodeid)]
+        assert list(tracker.storage) == [urllib_parse.quote(node.nodeid)]
 
 
 class TestRunner(object):
@@ -115,8 +264,16 @@ class TestRunner(object):
         return "{}_worker_gw2.txt".format(self.FILE_NAME)
 
     @pytest.fixture
-    def runner(self, config, expected_file):
-        config.getoption.return_value = expected_file
+    def options(self, expected_file):
+        return {
+            "--from-xdist-stats": expected_file,
+            "--xdist-stats-prune": False,
+            "--xdist-stats-prune-target": None,
+        }
+
+    @pytest.fixture
+    def runner(self, config, options):
+        config.getoption.side_effect = options.get
         assert config.args == ["tests/backend/unit"]
         r = Runner(config=config)
         assert config.args != ["tests/backend/unit"] and config.args
@@ -197,20 +354,94 @@ class TestRunner(object):
     def test_instance(self, runner, config, default_test_nodeid):
         assert runner.config == config
         assert runner._target_tests is not None
-        assert runner.target_tests == runner._target_tests
-        assert runner.target_tests == [default_test_nodeid]
+        assert runner.target_tests is runner._target_tests
+        assert list(runner.target_tests) == [default_test_nodeid]
 
     def test_read_target_tests(self, expected_file_path, runner, default_test_nodeid):
         tests = runner.read_target_tests()
-        assert tests == [default_test_nodeid]
+        assert list(tests) == [default_test_nodeid]
 
     def test_read_target_tests_file_absent(self, runner):
         runner.config.getoption.side_effect = "file_not_exist.txt"
         with pytest.raises(FileNotFoundError):
             runner.read_target_tests()
 
+    @pytest.mark.parametrize("reference", ("last-failed:gw3", "last-failed"))
+    def test_read_target_tests_archive_disabled(self, runner, options, reference):
+        options["--from-xdist-stats"] = reference
+        with pytest.raises(pytest.UsageError, match="archive of runs is disabled"):
+            runner.read_target_tests()
+
+    def test_read_target_tests_bare_last(self, runner, options):
+        # bare `last` is not a reference, read as a file
+        options["--from-xdist-stats"] = "last"
+        with pytest.raises(FileNotFoundError):
+            runner.read_target_tests()
+
     def test_target_tests(self, runner, node, default_test_nodeid):
-        assert runner.target_tests == [default_test_nodeid]
+        assert list(runner.target_tests) == [default_test_nodeid]
+
+    @pytest.fixture
+    def history(self, expected_file):
+        """
+        Returns
+        -------
+        List[Tuple[str, List[str]]]
+        """
+        history = [
+            ("tests/test_a.py::test_db", ["session:db"]),
+            ("tests/test_b.py::test_other", ["session:cache"]),
+            ("tests/test_c.py::test_module", ["module:client"]),
+            ("tests/test_c.py::test_plain", []),
+            ("tests/test_d.py::test_db", ["session:db", "module:client"]),
+            ("tests/test_b.py::test_after", ["session:db"]),
+        ]
+        with open(expected_file, "w") as file:
+            file.write(
+                "\n".join(
+                    format_line(urllib_parse.quote(name), fixtures)
+                    for name, fixtures in history
+                )
+            )
+        return history
+
+    def test_read_target_tests_with_fixtures(self, history, runner):
+        assert list(runner.target_tests) == [name for name, _ in history]
+        assert runner.fixtures == [tuple(fixtures) for _, fixtures in history]
+
+    @pytest.mark.parametrize(
+        "target, expected",
+        (
+            (
+                "tests/test_d.py::test_db",
+                ["tests/test_a.py::test_db", "tests/test_d.py::test_db"],
+            ),
+            (
+                "tests/test_c.py::test_plain",
+                ["tests/test_c.py::test_module", "tests/test_c.py::test_plain"],
+            ),
+            (
+                None,
+                [
+                    "tests/test_a.py::test_db",
+                    "tests/test_b.py::test_other",
+                    "tests/test_d.py::test_db",
+                    "tests/test_b.py::test_after",
+                ],
+            ),
+        ),
+    )
+    def test_prune(self, history, options, config, target, expected):
+        options["--xdist-stats-prune"] = True
+        options["--xdist-stats-prune-target"] = target
+        config.getoption.side_effect = options.get
+        runner = Runner(config=config)
+        assert list(runner.target_tests) == expected
+        assert sorted(config.args) == sorted({t.split("::")[0] for t in expected})
+
+    def test_prune_unknown_target(self, history, runner):
+        with pytest.raises(pytest.UsageError):
+            runner.prune(runner.target_tests, "tests/test_x.py::test_x")
 
     def test_find_necessary(self, runner, target_tests, items):
         runner._target_tests = target_tests